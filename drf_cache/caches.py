@@ -1,19 +1,78 @@
-import json
-import codecs
+import operator
+import zlib
+from contextlib import contextmanager
 from functools import partial
+from itertools import islice
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    import json
+
+try:
+    import deflate
+except ImportError:
+    deflate = None
+
+from asgiref.local import Local
 from django.conf import settings
 from django.core.cache import caches
+from django.core.signals import setting_changed
 from django.db.models.signals import post_save
 from django.db.models.signals import post_delete
 from django.db.models.signals import m2m_changed
 
 from rest_framework.serializers import ModelSerializer
 
+from .signals import defer_changes
+from .signals import get_deferred
 from .signals import handle_change
 from .signals import handle_delete
 
 
+if orjson is not None:
+    # The stdlib json module turns int, float and bool keys into strings, orjson needs to be told to
+    json_dumps = partial(orjson.dumps, option=orjson.OPT_NON_STR_KEYS)
+    json_loads = orjson.loads
+else:
+    def json_dumps(value):
+        return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+    json_loads = json.loads
+
+if deflate is not None:
+    zlib_compress = deflate.zlib_compress
+else:
+    zlib_compress = zlib.compress
+
+# libdeflate needs the uncompressed size up front, which is not stored with the value,
+# its output is a standard zlib stream though, so the stdlib can decompress it
+zlib_decompress = zlib.decompress
+
+
+def skip_compression(value):
+    return value
+
+
+# Shared cache instances, scoped like django's cache connections (per thread, or per context under ASGI)
+_instances = Local()
+
+
+def reset_instances(setting, **kwargs):
+    global _instances
+    if setting == 'CACHES':
+        _instances = Local()  # instances hold on to backends of the replaced cache handler
+
+
+setting_changed.connect(reset_instances)
+
+
+# First byte of a stored value, tells whether the rest of it is compressed
+RAW_MARKER = b'\x00'
+COMPRESSED_MARKER = b'\x01'
+
+
 class SerializedModelCache:
     # Required
     serializer_class = None
@@ -22,6 +81,12 @@ class SerializedModelCache:
     lookup_field = 'pk'
     key_prefix = ''
     compress_data = True
+    compress_threshold = 256  # values shorter than this (in bytes) are stored uncompressed, as zlib
+    # overhead makes small payloads bigger and costs time on every read
+    compress_level = 1  # zlib level 1-9, cached values are short lived so speed is preferred over ratio,
+    # level 1 is several times faster than the default 6 and only slightly bigger for JSON
+    key_suffixes = ('',)  # all key suffixes the cache is used with, delete removes the key for each of them,
+    # None makes delete remove every key starting with the instance key (requires django_redis and scans the keys)
 
     # Django cache attributes (optional)
     backend = 'default'
@@ -39,79 +104,188 @@ class SerializedModelCache:
             f'"serializer_class" attribute must be an subclass of rest_framework.serializers.ModelSerializer'
         assert isinstance(cls.key_prefix, str), '"key_prefix" attribute must be a string'
         assert isinstance(cls.lookup_field, str), '"lookup_field" attribute must be a string'
+        assert 1 <= cls.compress_level <= 9, '"compress_level" attribute must be between 1 and 9'
+        assert cls.key_suffixes is None or all(isinstance(suffix, str) for suffix in cls.key_suffixes), \
+            '"key_suffixes" attribute must be None or a tuple of strings'
 
         cache_settings = getattr(settings, 'CACHES')
         assert cache_settings and cls.backend in cache_settings, f'"{cls.backend}" is not a django cache backend'
 
         cls.model = cls.serializer_class.Meta.model
+        cls._lookup_attrgetter = operator.attrgetter(cls.lookup_field)
+        cls._key_template = f'{cls.key_prefix}{cls.__name__}:'.replace('%', '%%') + '%s%s'
+
+        # Pick the (de)compression methods once, unless the class provides its own
+        for name in ('compress_value', 'decompress_value'):
+            if getattr(cls, name) in (getattr(SerializedModelCache, name), skip_compression):
+                method = getattr(SerializedModelCache, name) if cls.compress_data else staticmethod(skip_compression)
+                setattr(cls, name, method)
+
+    def __init__(self):
+        self.cache = caches[self.backend]
+        # Bound once, these are called for every cached object
+        self._get = self.cache.get
+        self._get_many = self.cache.get_many
+        self._set = self.cache.set
+        self._set_many = self.cache.set_many
+        self._delete = self.cache.delete
+        self._delete_many = self.cache.delete_many
+        self._serializer = None
 
-    @property
-    def cache(self):
-        return caches[self.backend]
+    @classmethod
+    def instance(cls):
+        """Returns an instance shared within the current thread (or async context), like django's cache backends"""
+        try:
+            instances = _instances.instances
+        except AttributeError:
+            instances = _instances.instances = {}
+
+        instance = instances.get(cls)
+        if instance is None:
+            instance = instances[cls] = cls()
+        return instance
+
+    def serialize(self, instance):
+        """Reuses a single serializer, so its fields are only built and bound once"""
+        if self._serializer is None:
+            self._serializer = self.serializer_class()
+
+        self._serializer.instance = instance
+        try:
+            return self._serializer.data
+        finally:
+            self._serializer.__dict__.pop('_data', None)  # data is cached on the serializer
 
     def compress_value(self, value):
-        if not self.compress_data:
-            return value
+        value = json_dumps(value)
+        if len(value) < self.compress_threshold:
+            return RAW_MARKER + value
 
-        value = json.dumps(value, separators=(',', ':'))
-        return codecs.encode(value.encode('utf-8'), encoding='zlib')
+        return COMPRESSED_MARKER + zlib_compress(value, self.compress_level)
 
     def decompress_value(self, value):
-        if not self.compress_data:
-            return value
-
         if value is None:
             return None
 
-        value = codecs.decode(value, encoding='zlib')
-        return json.loads(value, encoding='utf-8')
+        marker = value[:1]
+        if marker == RAW_MARKER:
+            return json_loads(value[1:])
+        if marker == COMPRESSED_MARKER:
+            return json_loads(zlib_decompress(value[1:]))
+
+        return json_loads(zlib_decompress(value))  # stored before markers were introduced
 
     def get_lookup_value(self, instance):
-        return getattr(instance, self.lookup_field)
+        return self._lookup_attrgetter(instance)
 
     def make_key(self, lookup_value, suffix=''):
-        return f'{self.key_prefix}{self.__class__.__name__}:{lookup_value}{suffix}'
+        return self._key_template % (lookup_value, suffix)
 
     def get(self, lookup_value, key_suffix=''):
         key = self.make_key(lookup_value, suffix=key_suffix)
-        data = self.cache.get(key, version=self.version)
+        data = self._get(key, version=self.version)
         return self.decompress_value(data)
 
+    def get_many(self, lookup_values, key_suffix=''):
+        keys = {lookup_value: self.make_key(lookup_value, suffix=key_suffix) for lookup_value in lookup_values}
+        data = self._get_many(keys.values(), version=self.version)
+        return {lookup_value: self.decompress_value(data.get(key)) for lookup_value, key in keys.items()}
+
+    def check_key_suffix(self, key_suffix):
+        assert self.key_suffixes is None or key_suffix in self.key_suffixes, \
+            f'"{key_suffix}" is not in "key_suffixes" of {self.__class__.__name__}, delete would leave it stale'
+
+    def make_items(self, instance, data, key_suffix=''):
+        """Returns all the cache keys and values that need to be stored for the instance"""
+        self.check_key_suffix(key_suffix)
+        key = self.make_key(self.get_lookup_value(instance), suffix=key_suffix)
+        return {key: self.compress_value(data)}
+
     def set_data(self, instance, data, key_suffix=''):
+        self.check_key_suffix(key_suffix)
         lookup_value = self.get_lookup_value(instance)
         compressed_data = self.compress_value(data)
         key = self.make_key(lookup_value, suffix=key_suffix)
-        self.cache.set(key, compressed_data, timeout=self.timeout, version=self.version)
+        self._set(key, compressed_data, timeout=self.timeout, version=self.version)
 
     def set(self, instance, key_suffix=''):
-        data = self.serializer_class(instance=instance).data
+        data = self.serialize(instance)
         self.set_data(instance, data, key_suffix=key_suffix)
 
         return data
 
-    def delete(self, instance, key_suffix=''):
+    def set_many(self, instances, key_suffix=''):
+        data = [self.serialize(instance) for instance in instances]
+        items = {}
+        for instance, instance_data in zip(instances, data):
+            items.update(self.make_items(instance, instance_data, key_suffix=key_suffix))
+        self._set_many(items, timeout=self.timeout, version=self.version)
+
+        return data
+
+    def get_delete_keys(self, instance, key_suffix=''):
         lookup_value = self.get_lookup_value(instance)
-        key = self.make_key(lookup_value, suffix=key_suffix)
+        # Same keys the pattern delete would match, every known suffix starting with key_suffix
+        return [
+            self.make_key(lookup_value, suffix=suffix)
+            for suffix in self.key_suffixes
+            if suffix.startswith(key_suffix)
+        ]
+
+    def delete(self, instance, key_suffix=''):
+        if self.key_suffixes is None:
+            key = self.make_key(self.get_lookup_value(instance), suffix=key_suffix)
+            return self.cache.delete_pattern(key + '*', version=self.version)
 
-        return self.cache.delete_pattern(key + '*', version=self.version)
+        return self._delete_many(self.get_delete_keys(instance, key_suffix=key_suffix), version=self.version)
 
-    def populate(self, key_suffix='', **filter_kwargs):
-        for instance in self.model.objects.filter(**filter_kwargs):
-            self.set(instance, key_suffix=key_suffix)
+    def populate(self, key_suffix='', batch_size=1000, **filter_kwargs):
+        instances = self.model.objects.filter(**filter_kwargs).iterator()
+        while True:
+            batch = list(islice(instances, batch_size))
+            if not batch:
+                break
+            self.set_many(batch, key_suffix=key_suffix)
+
+    @classmethod
+    @contextmanager
+    def bulk_defer(cls):
+        """Caches the instances changed within the block with a single set_many when it exits
+
+            with MyCache.bulk_defer():
+                for row in rows:
+                    MyModel.objects.create(**row)
+
+        bulk_create and queryset updates don't send post_save, use populate after those instead.
+        """
+        if get_deferred(cls) is not None:  # nested, the outermost block caches the instances
+            yield
+            return
+
+        with defer_changes(cls) as instances:
+            yield
+
+            # Not flushed when the block raises, the changes may have been rolled back
+            if instances:
+                cls.instance().set_many(list(instances.values()))
 
     @classmethod
     def register_signals(cls):
         handle_change_for_cache = partial(handle_change, cache_class=cls)
         handle_delete_for_cache = partial(handle_delete, cache_class=cls)
 
-        post_save.connect(handle_change_for_cache, sender=cls.model)
-        post_delete.connect(handle_delete_for_cache, sender=cls.model)
+        # The partials aren't referenced anywhere else, so they must not be connected weakly,
+        # dispatch_uid keeps repeated registrations from connecting them again
+        dispatch_uid = f'{cls.__module__}.{cls.__qualname__}'
+        post_save.connect(handle_change_for_cache, sender=cls.model, weak=False, dispatch_uid=dispatch_uid)
+        post_delete.connect(handle_delete_for_cache, sender=cls.model, weak=False, dispatch_uid=dispatch_uid)
 
     @classmethod
     def register_signal_for_m2m(cls, m2m_field_name):
         handle_change_for_cache = partial(handle_change, cache_class=cls)
         m2m_model = getattr(cls.model, m2m_field_name).through
-        m2m_changed.connect(handle_change_for_cache, sender=m2m_model)
+        dispatch_uid = f'{cls.__module__}.{cls.__qualname__}'
+        m2m_changed.connect(handle_change_for_cache, sender=m2m_model, weak=False, dispatch_uid=dispatch_uid)
 
 
 class SerializedModelCacheWithIndexes(SerializedModelCache):
@@ -128,44 +302,56 @@ class SerializedModelCacheWithIndexes(SerializedModelCache):
             index_names.append(index_name)
 
         cls.index_names = tuple(index_names)
+        cls._index_template = f'{cls.key_prefix}{cls.__name__}:i:'.replace('%', '%%') + '%s:%s'
 
     def make_index_key(self, index_name, index_value):
-        return f'{self.key_prefix}{self.__class__.__name__}:i:{index_name}:{index_value}'
+        return self._index_template % (index_name, index_value)
 
     def get_index_keys(self, instance):
-        for index_name, index_value_getter in self.indexes:
-            index_values = index_value_getter(instance)
+        return [
+            self.make_index_key(index_name, index_value)
+            for index_name, index_value_getter in self.indexes
+            for index_value in index_value_getter(instance)
+        ]
 
-            for index_value in index_values:
-                yield self.make_index_key(index_name, index_value)
+    def make_index_items(self, instance):
+        lookup_value = self.get_lookup_value(instance)
+        return {index_key: lookup_value for index_key in self.get_index_keys(instance)}
 
     def set_indexes(self, instance):
-        lookup_value = self.get_lookup_value(instance)
-        for index_key in self.get_index_keys(instance):
-            self.cache.set(index_key, lookup_value, version=self.version)
+        self._set_many(self.make_index_items(instance), timeout=self.timeout, version=self.version)
 
     def get_for_index(self, index_name, index_value, key_suffix=''):
         assert index_name in self.index_names, f'"{index_name}" is not a valid index_name'
         index_key = self.make_index_key(index_name, index_value)
-        lookup_value = self.cache.get(index_key, version=self.version)
+        lookup_value = self._get(index_key, version=self.version)
 
         if lookup_value is None:
             return None
 
         key = self.make_key(lookup_value, suffix=key_suffix)
-        data = self.cache.get(key, version=self.version)
+        data = self._get(key, version=self.version)
         return self.decompress_value(data)
 
+    def make_items(self, instance, data, key_suffix=''):
+        items = super().make_items(instance, data, key_suffix=key_suffix)
+        items.update(self.make_index_items(instance))
+        return items
+
     def set_data(self, instance, data, key_suffix=''):
-        super().set_data(instance, data, key_suffix=key_suffix)
-        self.set_indexes(instance)
+        # Data and index keys are written in one call, django_redis sends set_many through a pipeline
+        items = self.make_items(instance, data, key_suffix=key_suffix)
+        self._set_many(items, timeout=self.timeout, version=self.version)
+
+    def get_delete_keys(self, instance, key_suffix=''):
+        return super().get_delete_keys(instance, key_suffix=key_suffix) + self.get_index_keys(instance)
 
     def delete(self, instance, key_suffix=''):
-        for index_key in self.get_index_keys(instance):
-            self.cache.delete(index_key)
+        if self.key_suffixes is None:
+            self._delete_many(self.get_index_keys(instance), version=self.version)
 
         return super().delete(instance, key_suffix=key_suffix)
 
     def delete_index(self, index_name, index_value):
         index_key = self.make_index_key(index_name, index_value)
-        self.cache.delete(index_key)
+        self._delete(index_key, version=self.version)
@@ -3,13 +3,17 @@ from rest_framework.response import Response
 
 from .caches import SerializedModelCache
 from .caches import SerializedModelCacheWithIndexes
+from .signals import defer_changes
+from .signals import get_deferred
 
 
 class CachedMixin:
     cache_class = None
 
     def __init_subclass__(cls, **kwargs):
-        if cls.__name__ in ['CachedRetrieveModelMixin', 'CachedListModelMixin', 'CachedIndexedRetrieveModelMixin']:
+        if cls.__name__ in ['CachedRetrieveModelMixin', 'CachedListModelMixin', 'CachedIndexedRetrieveModelMixin',
+                            'CachedCreateModelMixin', 'CachedUpdateModelMixin',
+                            'CachedReadOnlyModelViewSet', 'CachedModelViewSet']:
             return
         assert issubclass(cls.cache_class, SerializedModelCache), \
             '"cache_class" has to be set and a subclass of "SerializedModelCache"'
@@ -23,7 +27,7 @@ class CachedMixin:
         return self.lookup_url_kwarg or self.lookup_field
 
     def get_cache(self, *args, **kwargs):
-        return self.cache_class()
+        return self.cache_class.instance()
 
     def get_cache_key_suffix(self, *args, **kwargs):
         return ''
@@ -41,12 +45,47 @@ class CachedMixin:
         else:
             return self.get_serializer(instance).data
 
+    def get_and_cache_many(self, instances, cache, key_suffix):
+        to_cache = [instance for instance in instances if self.cache_instance(instance)]
+        if not to_cache:
+            return [self.get_serializer(instance).data for instance in instances]
+
+        cached_data = dict(zip(to_cache, cache.set_many(to_cache, key_suffix=key_suffix)))
+
+        return [
+            cached_data[instance] if instance in cached_data else self.get_serializer(instance).data
+            for instance in instances
+        ]
+
     def get_from_cache(self, cache, lookup_value, key_suffix=''):
         if self.request.query_params.get('refresh_cache'):
             return None  # Force cache refresh
 
         return cache.get(lookup_value, key_suffix=key_suffix)
 
+    def perform_and_cache(self, perform, serializer):
+        """
+        Defers the signal handlers while the serializer writes the instance, so it's serialized for the cache
+        once after all writes (including m2m fields), the response reuses that data if the view serializes
+        the instance with the cache's serializer_class
+        """
+        if get_deferred(self.cache_class) is not None:
+            return perform(serializer)  # an outer bulk_defer caches the changes
+
+        with defer_changes(self.cache_class) as instances:
+            perform(serializer)
+
+        if not instances:
+            return  # signals aren't registered for the cache
+
+        cache = self.cache_class.instance()
+        cached_data = dict(zip(instances, cache.set_many(list(instances.values()))))
+
+        if self.get_serializer_class() is self.cache_class.serializer_class:
+            data = cached_data.get(cache.get_lookup_value(serializer.instance))
+            if data is not None:
+                serializer._data = data
+
     def get_lookup_value(self):
         # Get the name of the lookup parameter.
         lookup_url_kwarg = self.lookup_field_name
@@ -77,6 +116,18 @@ class CachedRetrieveModelMixin(mixins.RetrieveModelMixin, CachedMixin):
         return Response(self.process_data(data))
 
 
+class CachedCreateModelMixin(mixins.CreateModelMixin, CachedMixin):
+
+    def perform_create(self, serializer):
+        self.perform_and_cache(super().perform_create, serializer)
+
+
+class CachedUpdateModelMixin(mixins.UpdateModelMixin, CachedMixin):
+
+    def perform_update(self, serializer):
+        self.perform_and_cache(super().perform_update, serializer)
+
+
 class CachedIndexedRetrieveModelMixin(CachedRetrieveModelMixin):
     cache_index = None
 
@@ -107,23 +158,23 @@ class CachedListModelMixin(mixins.ListModelMixin, CachedMixin):
 
         page = self.paginate_queryset(queryset.values_list(self.lookup_field, flat=True))
         if page is not None:
-            results = []
-            cache_miss_indexes, cache_misses = [], []
-
-            for index, lookup_value in enumerate(page):
-                data = cache.get(lookup_value, key_suffix=key_suffix)
-                if data is None:
-                    cache_misses.append(lookup_value)
-                    cache_miss_indexes.append(index)
-                else:
-                    data = self.process_data(data)
-                results.append(data)
-
-            filter_kwargs = {self.lookup_field_name + '__in': cache_misses}
-            for index, instance in zip(cache_miss_indexes, queryset.filter(**filter_kwargs)):
-                data = self.get_and_cache_data(instance, cache, key_suffix)
-                results[index] = self.process_data(data)  # TODO: check if this preserves order
-
+            page = tuple(page)  # iterated several times below, whatever the paginator returned
+            cached_data = cache.get_many(page, key_suffix=key_suffix)
+            results = [cached_data[lookup_value] for lookup_value in page]
+            cache_miss_indexes = [index for index, data in enumerate(results) if data is None]
+            cache_misses = [page[index] for index in cache_miss_indexes]
+
+            instances = queryset.in_bulk(cache_misses, field_name=self.lookup_field)
+            found = [
+                (index, instances[lookup_value])
+                for index, lookup_value in zip(cache_miss_indexes, cache_misses)
+                if lookup_value in instances  # may have been deleted since the page was fetched
+            ]
+            found_data = self.get_and_cache_many([instance for _, instance in found], cache, key_suffix)
+            for (index, _), data in zip(found, found_data):
+                results[index] = data
+
+            results = [self.process_data(data) for data in results if data is not None]
             return self.get_paginated_response(results)
 
         serializer = self.get_serializer(queryset, many=True)
@@ -1,9 +1,46 @@
+from contextlib import contextmanager
+
+from asgiref.local import Local
+
+# Scoped like the shared cache instances, per thread or per context under ASGI
+_local = Local()
+
+
+@contextmanager
+def defer_changes(cache_class):
+    """Collects the instances handle_change gets within the block, keyed by lookup_value, instead of caching them"""
+    if not hasattr(_local, 'deferred'):
+        _local.deferred = {}
+
+    instances = _local.deferred[cache_class] = {}
+    try:
+        yield instances
+    finally:
+        del _local.deferred[cache_class]
+
+
+def get_deferred(cache_class):
+    return getattr(_local, 'deferred', {}).get(cache_class)
+
 
 def handle_change(instance, cache_class=None, **kwargs):
-    cache = cache_class()
+    action = kwargs.get('action')
+    if action is not None and not action.startswith('post_'):
+        return  # m2m_changed is sent both before and after each change, only the result needs caching
+
+    cache = cache_class.instance()
+    deferred = get_deferred(cache_class)
+    if deferred is not None:
+        deferred[cache.get_lookup_value(instance)] = instance
+        return
+
     cache.set(instance)
 
 
 def handle_delete(instance, cache_class=None, **kwargs):
-    cache = cache_class()
+    cache = cache_class.instance()
+    deferred = get_deferred(cache_class)
+    if deferred is not None:
+        deferred.pop(cache.get_lookup_value(instance), None)
+
     cache.delete(instance)
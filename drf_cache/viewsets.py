@@ -1,17 +1,19 @@
 from rest_framework import mixins
 from rest_framework.viewsets import GenericViewSet
 
+from .mixins import CachedCreateModelMixin
 from .mixins import CachedListModelMixin
 from .mixins import CachedRetrieveModelMixin
+from .mixins import CachedUpdateModelMixin
 
 
 class CachedReadOnlyModelViewSet(CachedRetrieveModelMixin, CachedListModelMixin, GenericViewSet):
     pass
 
 
-class CachedModelViewSet(mixins.CreateModelMixin,
+class CachedModelViewSet(CachedCreateModelMixin,
                          CachedRetrieveModelMixin,
-                         mixins.UpdateModelMixin,
+                         CachedUpdateModelMixin,
                          mixins.DestroyModelMixin,
                          CachedListModelMixin,
                          GenericViewSet):
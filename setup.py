@@ -14,7 +14,8 @@ setup(
     zip_safe=False,
     include_package_data=True,
     package_data={'': ['README.md']},
-    install_requires=['django>=1.8.0', 'djangorestframework>=3.7.0'],
+    install_requires=['django>=3.0', 'djangorestframework>=3.7.0'],
+    extras_require={'orjson': ['orjson'], 'deflate': ['deflate']},
     classifiers=[
         'Environment :: Web Environment',
         'Framework :: Django',
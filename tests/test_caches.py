@@ -0,0 +1,77 @@
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework import serializers
+
+from drf_cache.caches import SerializedModelCache
+from drf_cache.caches import SerializedModelCacheWithIndexes
+
+
+class GroupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Group
+        fields = ('id', 'name')
+
+
+class SuffixedGroupCache(SerializedModelCache):
+    serializer_class = GroupSerializer
+    key_suffixes = (':en', ':de')
+
+
+class DeleteTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(name='group')
+        self.cache = SuffixedGroupCache.instance()
+
+    def test_delete_with_suffix(self):
+        self.cache.set(self.group, key_suffix=':en')
+        self.cache.set(self.group, key_suffix=':de')
+
+        self.cache.delete(self.group, key_suffix=':en')
+
+        self.assertIsNone(self.cache.get(self.group.pk, key_suffix=':en'))
+        self.assertIsNotNone(self.cache.get(self.group.pk, key_suffix=':de'))
+
+    def test_delete_without_suffix_deletes_all_suffixes(self):
+        self.cache.set(self.group, key_suffix=':en')
+        self.cache.set(self.group, key_suffix=':de')
+
+        self.cache.delete(self.group)
+
+        self.assertIsNone(self.cache.get(self.group.pk, key_suffix=':en'))
+        self.assertIsNone(self.cache.get(self.group.pk, key_suffix=':de'))
+
+
+class CompressionTestCase(TestCase):
+
+    def setUp(self):
+        self.cache = SuffixedGroupCache.instance()
+
+    def test_non_string_keys(self):
+        value = {1: 'a', 'b': 'x' * 1000}
+        compressed = self.cache.compress_value(value)
+        self.assertEqual(self.cache.decompress_value(compressed), {'1': 'a', 'b': 'x' * 1000})
+
+
+class VersionedIndexedGroupCache(SerializedModelCacheWithIndexes):
+    serializer_class = GroupSerializer
+    version = 2
+    indexes = (('name', lambda instance: [instance.name]),)
+
+
+class IndexTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(name='group')
+        self.cache = VersionedIndexedGroupCache.instance()
+
+    def test_delete_index(self):
+        self.cache.set(self.group)
+        self.assertEqual(self.cache.get_for_index('name', 'group'), {'id': self.group.pk, 'name': 'group'})
+
+        self.cache.delete_index('name', 'group')
+
+        self.assertIsNone(self.cache.get_for_index('name', 'group'))
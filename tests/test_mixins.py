@@ -0,0 +1,81 @@
+from unittest import mock
+
+from django.contrib.auth.models import Group
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory
+
+from drf_cache.caches import SerializedModelCache
+from drf_cache.viewsets import CachedModelViewSet
+
+
+class GroupPermissionsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Group
+        fields = ('id', 'name', 'permissions')
+
+
+class GroupPermissionsCache(SerializedModelCache):
+    serializer_class = GroupPermissionsSerializer
+
+
+class GroupViewSet(CachedModelViewSet):
+    queryset = Group.objects.order_by('id')
+    serializer_class = GroupPermissionsSerializer
+    cache_class = GroupPermissionsCache
+
+
+class WriteTestCase(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        GroupPermissionsCache.register_signals()
+        GroupPermissionsCache.register_signal_for_m2m('permissions')
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.permission = Permission.objects.first()
+
+    def create(self):
+        request = self.factory.post('/', {'name': 'group', 'permissions': [self.permission.pk]}, format='json')
+        return GroupViewSet.as_view({'post': 'create'})(request)
+
+    def test_create(self):
+        with mock.patch.object(
+            GroupPermissionsSerializer, 'to_representation', autospec=True,
+            side_effect=serializers.ModelSerializer.to_representation,
+        ) as to_representation:
+            response = self.create()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['permissions'], [self.permission.pk])
+        self.assertEqual(GroupPermissionsCache.instance().get(response.data['id']), response.data)
+        self.assertEqual(to_representation.call_count, 1)
+
+    def test_update(self):
+        group_id = self.create().data['id']
+
+        request = self.factory.put('/', {'name': 'updated', 'permissions': []}, format='json')
+        response = GroupViewSet.as_view({'put': 'update'})(request, pk=group_id)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'id': group_id, 'name': 'updated', 'permissions': []})
+        self.assertEqual(GroupPermissionsCache.instance().get(group_id), response.data)
+
+    def test_other_serializer_class_is_not_reused(self):
+        class NameSerializer(serializers.ModelSerializer):
+            class Meta:
+                model = Group
+                fields = ('name',)
+
+        with mock.patch.object(GroupViewSet, 'get_serializer_class', return_value=NameSerializer):
+            request = self.factory.post('/', {'name': 'group'}, format='json')
+            response = GroupViewSet.as_view({'post': 'create'})(request)
+
+        self.assertEqual(response.data, {'name': 'group'})
+        group = Group.objects.get(name='group')
+        self.assertEqual(GroupPermissionsCache.instance().get(group.pk)['name'], 'group')
@@ -0,0 +1,71 @@
+import gc
+
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db.models.signals import post_save
+from django.test import TestCase
+
+from drf_cache.caches import SerializedModelCache
+
+from .test_caches import GroupSerializer
+
+
+class SignalGroupCache(SerializedModelCache):
+    serializer_class = GroupSerializer
+
+
+class RegisterSignalsTestCase(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        SignalGroupCache.register_signals()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_receivers_survive_garbage_collection(self):
+        gc.collect()
+        group = Group.objects.create(name='group')
+
+        self.assertEqual(SignalGroupCache.instance().get(group.pk), {'id': group.pk, 'name': 'group'})
+
+    def test_register_twice_connects_once(self):
+        receivers = len(post_save.receivers)
+        SignalGroupCache.register_signals()
+
+        self.assertEqual(len(post_save.receivers), receivers)
+
+
+class ViewSetsTestCase(TestCase):
+
+    def test_import(self):
+        from drf_cache import viewsets
+
+        self.assertTrue(viewsets.CachedModelViewSet)
+
+
+class BulkDeferTestCase(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        SignalGroupCache.register_signals()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_flushed_on_exit(self):
+        with SignalGroupCache.bulk_defer():
+            group = Group.objects.create(name='group')
+            self.assertIsNone(SignalGroupCache.instance().get(group.pk))
+
+        self.assertEqual(SignalGroupCache.instance().get(group.pk), {'id': group.pk, 'name': 'group'})
+
+    def test_not_flushed_on_error(self):
+        with self.assertRaises(ValueError):
+            with SignalGroupCache.bulk_defer():
+                group = Group.objects.create(name='group')
+                raise ValueError
+
+        self.assertIsNone(SignalGroupCache.instance().get(group.pk))